@@ -0,0 +1,228 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Compiled kernels for structure prediction and knot analysis.
+
+Optional ahead-of-time alternative to the Numba/NumPy paths, with no JIT
+warm-up. Build in place from this directory with:
+
+    CFLAGS="-O3 -march=native -ffast-math" cythonize -i -3 _core.pyx
+
+structure_predictor and knot_analyzer use it automatically when importable.
+"""
+
+import numpy as np
+
+ctypedef fused score_t:
+    short
+    int
+
+
+def nussinov_fill(const unsigned char[:] seq_codes, const unsigned char[:, :] pair_table,
+                  score_t[:, :] dp, score_t[:, :] bt, int min_loop, int max_span):
+    """Fill the banded dp and pointer offsets bt in place; see _nussinov_fill_loops."""
+    cdef Py_ssize_t n = seq_codes.shape[0]
+    cdef Py_ssize_t length, i, j, k
+    cdef int best, score, split
+    cdef unsigned char code_i
+
+    # Bounds checking is off, so make sure every cell the fill touches exists
+    if dp.shape[0] < n or bt.shape[0] < n or dp.shape[1] < max_span or bt.shape[1] < max_span:
+        raise IndexError("dp and bt must cover (len(seq_codes), max_span)")
+    for length in range(1, min(min_loop, max_span) + 1):
+        for i in range(n - length + 1):
+            bt[i, length - 1] = -1
+    for length in range(min_loop + 1, max_span + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            best = dp[i, length - 2] if length >= 2 else 0
+            split = -1
+            code_i = seq_codes[i]
+            for k in range(i, j):
+                if pair_table[code_i, seq_codes[k]]:
+                    score = 1
+                    if i + 1 <= k - 1:
+                        score += dp[i + 1, k - i - 2]
+                    if k + 1 <= j:
+                        score += dp[k + 1, j - k - 1]
+                    if score > best:
+                        best = score
+                        split = k - i
+            dp[i, length - 1] = best
+            bt[i, length - 1] = split
+
+
+def traceback_range(score_t[:, :] bt, Py_ssize_t i0, Py_ssize_t j0):
+    """Dot-bracket string for seq[i0:j0+1] from the banded traceback pointers."""
+    # Bounds checking is off, so reject spans outside the band before indexing it
+    if i0 < 0 or j0 >= bt.shape[0] or j0 - i0 >= bt.shape[1]:
+        raise IndexError(f"Span [{i0}, {j0}] outside the folded band")
+    if i0 > j0:
+        return ''
+    cdef Py_ssize_t size = j0 - i0 + 1
+    cdef bytearray structure = bytearray(b'.' * size)
+    cdef unsigned char[:] out = structure
+    # Each step pops one interval and pushes at most two, so 2 * (size + 1) entries suffice
+    cdef Py_ssize_t[:, :] work = np.empty((2 * (size + 1), 2), dtype=np.intp)
+    cdef Py_ssize_t top = 0, i, j, k
+
+    work[0, 0] = i0
+    work[0, 1] = j0
+    top = 1
+    while top:
+        top -= 1
+        i = work[top, 0]
+        j = work[top, 1]
+        if i > j:
+            continue
+        k = bt[i, j - i]
+        if k < 0:
+            work[top, 1] = j - 1
+            top += 1
+            continue
+        k += i
+        out[i - i0] = b'('
+        out[k - i0] = b')'
+        work[top, 0] = k + 1
+        work[top, 1] = j
+        work[top + 1, 0] = i + 1
+        work[top + 1, 1] = k - 1
+        top += 2
+
+    return structure.decode('ascii')
+
+
+def pairs_soa(str structure):
+    """Base pairs as int32 (opens, closes) arrays sorted by opening position."""
+    cdef bytes raw = structure.encode('ascii', 'replace')
+    cdef const unsigned char[:] chars = raw
+    cdef Py_ssize_t n = chars.shape[0], pos, depth = 0, count = 0
+    cdef int[:] stack = np.empty(n, dtype=np.int32)
+    opens_arr = np.empty(n // 2, dtype=np.int32)
+    closes_arr = np.empty(n // 2, dtype=np.int32)
+    cdef int[:] opens = opens_arr
+    cdef int[:] closes = closes_arr
+
+    for pos in range(n):
+        if chars[pos] == b'(':
+            stack[depth] = pos
+            depth += 1
+        elif chars[pos] == b')' and depth:
+            depth -= 1
+            opens[count] = stack[depth]
+            closes[count] = pos
+            count += 1
+
+    order = np.argsort(opens_arr[:count], kind='stable')
+    return opens_arr[:count][order], closes_arr[:count][order]
+
+
+def sweep_crossings(const int[:] opens, const int[:] closes):
+    """Crossing pairs among (opens, closes) sorted by open; see KnotAnalyzer._sweep_crossings."""
+    cdef Py_ssize_t n = opens.shape[0], p, a, b, lo, hi, active = 0
+    # Pairs still spanning the sweep: parallel arrays kept sorted by close
+    cdef int[:] act_close = np.empty(max(n, 1), dtype=np.int32)
+    cdef int[:] act_open = np.empty(max(n, 1), dtype=np.int32)
+    cdef int p2_i, p2_j
+    crossings = []
+
+    if closes.shape[0] != n:
+        raise ValueError("opens and closes must have the same length")
+
+    for p in range(n):
+        p2_i = opens[p]
+        p2_j = closes[p]
+        lo = 0
+        while lo < active and act_close[lo] <= p2_i:
+            lo += 1
+        if lo:
+            for a in range(lo, active):
+                act_close[a - lo] = act_close[a]
+                act_open[a - lo] = act_open[a]
+            active -= lo
+        hi = 0
+        while hi < active and act_close[hi] < p2_j:
+            crossings.append((act_open[hi], p2_i))
+            hi += 1
+        for b in range(active, hi, -1):
+            act_close[b] = act_close[b - 1]
+            act_open[b] = act_open[b - 1]
+        act_close[hi] = p2_j
+        act_open[hi] = p2_i
+        active += 1
+
+    crossings.sort()
+    return crossings
+
+
+def writhe(str structure):
+    """Writhe of a dot-bracket structure; see KnotAnalyzer.compute_writhe."""
+    cdef bytes raw = structure.encode('ascii', 'replace')
+    cdef const unsigned char[:] chars = raw
+    cdef Py_ssize_t n = chars.shape[0], pos, depth = 0
+    cdef int[:] stack = np.empty(max(n, 1), dtype=np.int32)
+    cdef long total = 0, depth_diff
+
+    for pos in range(n):
+        if chars[pos] == b'(':
+            stack[depth] = depth
+            depth += 1
+        elif chars[pos] == b')' and depth:
+            depth -= 1
+            depth_diff = depth - stack[depth]
+            total += (depth_diff > 0) - (depth_diff < 0)
+
+    return float(total)
+
+
+def compute_all(str structure):
+    """Pairs, writhe and nesting statistics in one scan; see KnotAnalyzer._compute_all."""
+    cdef bytes raw = structure.encode('ascii', 'replace')
+    cdef const unsigned char[:] chars = raw
+    cdef Py_ssize_t n = chars.shape[0], pos, r, top = 0, ranks = 0, count = 0
+    # The r-th '(' sits at open_at[r] and closes at partner[r] (-1 while unmatched),
+    # so walking ranks yields the pairs already sorted by opening position
+    cdef int[:] open_at = np.empty(max(n, 1), dtype=np.int32)
+    cdef int[:] partner = np.empty(max(n, 1), dtype=np.int32)
+    cdef int[:] stack = np.empty(max(n, 1), dtype=np.int32)
+    cdef int[:] level = np.empty(max(n, 1), dtype=np.int32)
+    cdef long total = 0, depth = 0, max_depth = 0, changes = 0, depth_diff
+
+    for pos in range(n):
+        if chars[pos] == b'(':
+            open_at[ranks] = pos
+            partner[ranks] = -1
+            stack[top] = ranks
+            level[top] = top
+            top += 1
+            ranks += 1
+            depth += 1
+        elif chars[pos] == b')':
+            depth -= 1
+            if top:
+                top -= 1
+                partner[stack[top]] = pos
+                count += 1
+                depth_diff = top - level[top]
+                total += (depth_diff > 0) - (depth_diff < 0)
+        else:
+            continue
+        # Every bracket moves the depth, so each one is a transition
+        if depth > max_depth:
+            max_depth = depth
+        changes += 1
+
+    opens_arr = np.empty(count, dtype=np.int32)
+    closes_arr = np.empty(count, dtype=np.int32)
+    cdef int[:] opens = opens_arr
+    cdef int[:] closes = closes_arr
+    count = 0
+    for r in range(ranks):
+        if partner[r] >= 0:
+            opens[count] = open_at[r]
+            closes[count] = partner[r]
+            count += 1
+
+    return {
+        'opens': opens_arr, 'closes': closes_arr, 'writhe': float(total),
+        'max_depth': max_depth, 'transitions': changes
+    }
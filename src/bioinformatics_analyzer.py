@@ -1,42 +1,86 @@
 """Bioinformatics Analysis - 5 Key Tests"""
 
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 from typing import Dict, List
 import seaborn as sns
 
 
+def _row_metrics(kr: List[Dict]):
+    """Per-row GC, Tm, homopolymer, entropy and complexity lists for kr."""
+    gc, tm, hp, ent, cplx = [], [], [], [], []
+    for r in kr:
+        seq = r.get('sequence', '')
+        st = r.get('structure', '')
+        if seq and len(seq) > 0:
+            b = np.frombuffer(seq.encode('ascii', 'replace'), dtype=np.uint8)
+            counts = np.bincount(b, minlength=128)
+            gc_v = int(counts[ord('G')] + counts[ord('C')]) / len(seq) * 100
+            gc.append(gc_v)
+            if len(seq) >= 14: 
+                tm.append(64 + 41 * (gc_v/100 - 0.5))
+            # Run lengths are the gaps between positions where the base changes
+            change = np.flatnonzero(b[1:] != b[:-1])
+            runs = np.diff(np.concatenate(([-1], change, [len(b) - 1])))
+            hp.append(int(runs.max()))
+        if st and len(st) > 0:
+            c = np.bincount(np.frombuffer(st.encode('ascii', 'replace'), dtype=np.uint8))
+            p = c[c > 0] / len(st)
+            ent.append(float(-(p * np.log2(p)).sum()))
+        cplx.append(r.get('complexity_score', 0))
+    return gc, tm, hp, ent, cplx
+
+
+# Codons are packed as c0 * 36 + c1 * 6 + c2 over the cleaned-sequence alphabet
+_CODON_BASES = 'ACGTUN'
+_CODON_CODES = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate(_CODON_BASES):
+    _CODON_CODES[ord(_base)] = _code
+
+
+def _top_codons(kr: List[Dict], n: int):
+    """Most frequent in-frame codons across all rows, ties broken by first occurrence."""
+    # Trim each sequence to whole codons so one joined buffer keeps every row in frame
+    joined = ''.join(seq[:len(seq) // 3 * 3] for seq in (r.get('sequence', '') for r in kr))
+    b = _CODON_CODES[np.frombuffer(joined.encode('ascii', 'replace'), dtype=np.uint8)].reshape(-1, 3)
+    b = b[(b != 255).all(axis=1)].astype(np.intp)
+    codes = b[:, 0] * 36 + b[:, 1] * 6 + b[:, 2]
+    counts = np.bincount(codes, minlength=len(_CODON_BASES) ** 3)
+    first = np.full(counts.size, codes.size)
+    seen, first_idx = np.unique(codes, return_index=True)
+    first[seen] = first_idx
+    order = [c for c in np.lexsort((first, -counts)).tolist() if counts[c]][:n]
+    return [(_CODON_BASES[c // 36] + _CODON_BASES[c // 6 % 6] + _CODON_BASES[c % 6], int(counts[c]))
+            for c in order]
+
+
 class BioinformaticsAnalyzer:
     """5 key bioinformatics analyses for DNA structures."""
     
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, workers: int = 1, dpi: int = 300):
         self.output_dir = output_dir
+        self.workers = workers
+        self.dpi = dpi
+        self._fig = None
         sns.set_style("whitegrid")
     
     def _metrics(self, kr: List[Dict]):
         """Calculate metrics with error handling."""
-        gc, tm, hp, ent, cplx = [], [], [], [], []
-        for r in kr:
-            seq = r.get('sequence', '')
-            st = r.get('structure', '')
-            if seq and len(seq) > 0:
-                gc_v = (seq.count('G') + seq.count('C')) / len(seq) * 100
-                gc.append(gc_v)
-                if len(seq) >= 14: 
-                    tm.append(64 + 41 * (gc_v/100 - 0.5))
-                mx, c = 1, 1
-                for i in range(1, len(seq)):
-                    c = c + 1 if seq[i] == seq[i-1] else 1
-                    mx = max(mx, c)
-                hp.append(mx)
-            if st and len(st) > 0:
-                ch = {}
-                for x in st:
-                    ch[x] = ch.get(x, 0) + 1
-                e = sum(-c/len(st) * np.log2(c/len(st)) for c in ch.values())
-                ent.append(e)
-            cplx.append(r.get('complexity_score', 0))
-        return gc, tm, hp, ent, cplx
+        if self.workers <= 1 or len(kr) < 2:
+            return _row_metrics(kr)
+        # Ship only the fields the metrics read, split into ~4 tasks per worker
+        rows = [{'sequence': r.get('sequence', ''), 'structure': r.get('structure', ''),
+                 'complexity_score': r.get('complexity_score', 0)} for r in kr]
+        size = max(1, len(rows) // (self.workers * 4))
+        chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+        metrics = ([], [], [], [], [])
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for part in pool.map(_row_metrics, chunks):
+                for acc, values in zip(metrics, part):
+                    acc.extend(values)
+        return metrics
     
     def analyze_all(self, kr: List[Dict]) -> Dict:
         """Generate all 5 tests."""
@@ -65,7 +109,7 @@ class BioinformaticsAnalyzer:
     def _p1(self, gc: List, cplx: List):
         """Test 1: GC vs Complexity."""
         if len(gc) < 2: return
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._axes((10, 6))
         ax.scatter(gc, cplx, alpha=0.6, s=100, c='#e74c3c', edgecolors='black')
         z = np.polyfit(gc, cplx, 1)
         ax.plot(sorted(gc), np.poly1d(z)(sorted(gc)), "r--", linewidth=2)
@@ -78,7 +122,7 @@ class BioinformaticsAnalyzer:
     def _p2(self, tm: List):
         """Test 2: Melting Temp."""
         if not tm: return
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._axes((10, 6))
         ax.hist(tm, bins=12, color='#e67e22', edgecolor='black', alpha=0.7)
         ax.axvline(np.mean(tm), color='red', linestyle='--', linewidth=2, label=f'Mean: {np.mean(tm):.1f}°C')
         ax.set_title('Test 2: Melting Temperature Distribution', fontweight='bold', fontsize=12)
@@ -90,7 +134,7 @@ class BioinformaticsAnalyzer:
     def _p3(self, hp: List, cplx: List):
         """Test 3: Homopolymer."""
         if not hp or not cplx: return
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._axes((10, 6))
         ax.scatter(hp, cplx, alpha=0.6, s=100, c='#9b59b6', edgecolors='black')
         ax.axvline(5, color='red', linestyle='--', linewidth=2, label='Threshold (5bp)')
         ax.set_title('Test 3: Homopolymer vs Complexity', fontweight='bold', fontsize=12)
@@ -103,7 +147,7 @@ class BioinformaticsAnalyzer:
     def _p4(self, ent: List):
         """Test 4: Entropy."""
         if not ent: return
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._axes((10, 6))
         ax.hist(ent, bins=15, color='#16a085', edgecolor='black', alpha=0.7)
         ax.axvline(np.mean(ent), color='red', linestyle='--', linewidth=2, label=f'Mean: {np.mean(ent):.3f}')
         ax.set_title('Test 4: Shannon Entropy Distribution', fontweight='bold', fontsize=12)
@@ -114,13 +158,8 @@ class BioinformaticsAnalyzer:
     
     def _p5(self, kr: List):
         """Test 5: Codon Bias."""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        cd = {}
-        for r in kr:
-            for i in range(0, len(r.get('sequence', '')) - 2, 3):
-                c = r['sequence'][i:i+3]
-                if len(c) == 3: cd[c] = cd.get(c, 0) + 1
-        top = sorted(cd.items(), key=lambda x: x[1], reverse=True)[:12]
+        fig, ax = self._axes((10, 6))
+        top = _top_codons(kr, 12)
         if top:
             codons, counts = zip(*top)
             bars = ax.barh(codons, counts, color='#3498db', edgecolor='black')
@@ -132,7 +171,7 @@ class BioinformaticsAnalyzer:
     
     def _psummary(self, r: Dict):
         """Summary report."""
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig, ax = self._axes((10, 8))
         ax.axis('off')
         text = f"""BIOINFORMATICS SUMMARY
 {'='*40}
@@ -153,8 +192,23 @@ Test 5 - Codon Bias: Complete"""
                bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
         self._save(fig, "bioinformatics_summary.png")
     
+    def _axes(self, figsize):
+        """Return the shared figure, cleared and resized, with fresh axes for the next plot."""
+        if self._fig is None:
+            # A bare Agg-backed Figure, kept out of pyplot's figure manager
+            self._fig = Figure(figsize=figsize)
+            FigureCanvasAgg(self._fig)
+        else:
+            # A fresh Axes rather than ax.clear(), which keeps grid settings from the last plot
+            self._fig.clear()
+            self._fig.set_size_inches(figsize)
+        return self._fig, self._fig.add_subplot()
+    
     def _save(self, fig, name: str):
         filepath = f"{self.output_dir}/{name}"
-        fig.savefig(filepath, dpi=300, bbox_inches='tight')
+        fig.savefig(filepath, dpi=self.dpi, bbox_inches='tight')
         print(f"    Saved: {name}")
-        plt.close(fig)
+    
+    def close(self):
+        """Release the shared plotting figure."""
+        self._fig = None
@@ -11,6 +11,10 @@ WINDOW_SIZE = 30
 ENERGY_THRESHOLD = -5.0
 MIN_STEM_LENGTH = 4
 MAX_LOOP_SIZE = 30
+FOLD_CACHE_SIZE = 4096  # Folds remembered per predictor, keyed by sequence (0 disables)
+
+# Parallelism (None uses every available CPU)
+MAX_WORKERS = None
 
 # Knot detection parameters
 KNOT_COMPLEXITY_THRESHOLD = 0.3
@@ -20,6 +24,7 @@ CROSSING_NUMBER_THRESHOLD = 2
 # Visualization parameters
 FIGURE_DPI = 300
 FIGURE_SIZE = (14, 10)
+LABEL_THRESHOLD = 200  # Longest sequence drawn with per-base letters
 COLOR_PALETTE = {
     'stem': '#2E86AB',
     'loop': '#A23B72',
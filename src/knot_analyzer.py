@@ -1,9 +1,68 @@
 """Knot detection and topological analysis module."""
 
+import bisect
+from dataclasses import dataclass, fields
 import numpy as np
 from typing import Dict, List, Tuple
 import config
 
+try:
+    import _core  # compiled kernels, built from _core.pyx
+except ImportError:  # the extension is optional; the Python/NumPy paths are used instead
+    _core = None
+
+# Below this length the per-character writhe loop beats NumPy's per-call overhead
+_VECTOR_WRITHE_MIN_LENGTH = 64
+
+
+@dataclass
+class WindowTable:
+    """Knot results for a set of windows stored column-wise (one array per field)."""
+    writhe: np.ndarray
+    crossing_count: np.ndarray
+    crossing_positions: List[List[Tuple[int, int]]]
+    linking_number: np.ndarray
+    knot_prone: np.ndarray
+    complexity_score: np.ndarray
+    risk_level: np.ndarray
+    window_start: np.ndarray
+    window_end: np.ndarray
+    sequence_id: List[str]
+    
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'WindowTable':
+        """Build a table from per-window result dicts."""
+        return cls(
+            writhe=np.array([r['writhe'] for r in records], dtype=float),
+            crossing_count=np.array([r['crossing_count'] for r in records], dtype=np.int32),
+            crossing_positions=[r['crossing_positions'] for r in records],
+            linking_number=np.array([r['linking_number'] for r in records], dtype=float),
+            knot_prone=np.array([r['knot_prone'] for r in records], dtype=bool),
+            complexity_score=np.array([r['complexity_score'] for r in records], dtype=float),
+            risk_level=np.array([r['risk_level'] for r in records], dtype='U8'),
+            window_start=np.array([r['window_start'] for r in records], dtype=np.int64),
+            window_end=np.array([r['window_end'] for r in records], dtype=np.int64),
+            sequence_id=[r['sequence_id'] for r in records]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.sequence_id)
+    
+    def __getitem__(self, index: int) -> Dict:
+        """Return one window as a result dict of plain Python values."""
+        row = {}
+        for field in fields(self):
+            value = getattr(self, field.name)[index]
+            row[field.name] = value.item() if isinstance(value, np.generic) else value
+        return row
+    
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+    
+    def to_records(self) -> List[Dict]:
+        """Convert back to a list of per-window result dicts."""
+        return list(self)
+
 
 class KnotAnalyzer:
     """Identify and analyze knot-forming regions."""
@@ -12,36 +71,68 @@ class KnotAnalyzer:
         self.writhe_threshold = writhe_threshold
         self.crossing_threshold = config.CROSSING_NUMBER_THRESHOLD
     
-    def _get_base_pairs(self, structure: str) -> List[Tuple[int, int]]:
-        """Extract base pair positions from dot-bracket notation."""
-        pairs, stack = [], []
+    def _pairs_soa(self, structure: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Extract base pairs as parallel int32 (opens, closes) arrays sorted by open."""
+        if _core is not None:
+            return _core.pairs_soa(structure)
+        opens, closes, stack = [], [], []
         for pos, char in enumerate(structure):
             if char == '(':
                 stack.append(pos)
             elif char == ')' and stack:
-                pairs.append((stack.pop(), pos))
-        return sorted(pairs)
+                opens.append(stack.pop())
+                closes.append(pos)
+        opens = np.asarray(opens, dtype=np.int32)
+        closes = np.asarray(closes, dtype=np.int32)
+        order = np.argsort(opens, kind='stable')
+        return opens[order], closes[order]
+    
+    def _get_base_pairs(self, structure: str) -> List[Tuple[int, int]]:
+        """Extract base pair positions from dot-bracket notation."""
+        opens, closes = self._pairs_soa(structure)
+        return list(zip(opens.tolist(), closes.tolist()))
     
     def compute_writhe(self, structure: str) -> float:
         """Compute writhe as measure of topological twist."""
-        writhe = 0.0
-        stack = []
-        for char in structure:
-            if char == '(':
-                stack.append(len(stack))
-            elif char == ')' and stack:
-                depth_diff = len(stack) - 1 - stack.pop()
-                writhe += np.sign(depth_diff) if depth_diff != 0 else 0
-        return writhe
+        if _core is not None:
+            return _core.writhe(structure)
+        if len(structure) < _VECTOR_WRITHE_MIN_LENGTH:
+            writhe, stack = 0, []
+            for char in structure:
+                if char == '(':
+                    stack.append(len(stack))
+                elif char == ')' and stack:
+                    depth_diff = len(stack) - 1 - stack.pop()
+                    writhe += (depth_diff > 0) - (depth_diff < 0)
+            return float(writhe)
+        
+        opens, closes = self._pairs_soa(structure)
+        if not opens.size:
+            return 0.0
+        # Depth counts every '(' but only matched ')'; a pair's depth
+        # difference is then depth[close] - depth[open] + 1
+        arr = np.frombuffer(structure.encode('ascii', 'replace'), dtype=np.uint8)
+        delta = (arr == ord('(')).astype(np.int32)
+        delta[closes] = -1
+        depth = np.cumsum(delta)
+        return float(np.sign(depth[closes] - depth[opens] + 1).sum())
     
     def identify_crossing_patterns(self, structure: str) -> List[Tuple[int, int]]:
         """Identify base pair crossings indicating knot-prone regions."""
-        crossings, pairs = [], self._get_base_pairs(structure)
-        for i, (p1_i, p1_j) in enumerate(pairs):
-            for p2_i, p2_j in pairs[i + 1:]:
-                if p1_i < p2_i < p1_j < p2_j or p2_i < p1_i < p2_j < p1_j:
-                    crossings.append((min(p1_i, p2_i), max(p1_i, p2_i)))
-        return crossings
+        return self._sweep_crossings(*self._pairs_soa(structure))
+    
+    def _sweep_crossings(self, opens: np.ndarray, closes: np.ndarray) -> List[Tuple[int, int]]:
+        """Find crossing pairs among (opens, closes) sorted by opening position."""
+        if _core is not None:
+            return _core.sweep_crossings(opens, closes)
+        crossings, open_pairs = [], []
+        # Sweep pairs by opening position; open_pairs holds (close, open) of pairs still spanning the sweep
+        for p2_i, p2_j in zip(opens.tolist(), closes.tolist()):
+            del open_pairs[:bisect.bisect_left(open_pairs, (p2_i + 1,))]
+            for p1_j, p1_i in open_pairs[:bisect.bisect_left(open_pairs, (p2_j,))]:
+                crossings.append((p1_i, p2_i))
+            bisect.insort(open_pairs, (p2_j, p2_i))
+        return sorted(crossings)
     
     def _calc_nesting_complexity(self, structure: str) -> float:
         """Calculate complexity from nesting depth and transitions."""
@@ -53,23 +144,66 @@ class KnotAnalyzer:
             max_depth = max(max_depth, depth)
             changes += 1 if depth != prev else 0
             prev = depth
+        return self._nesting_score(max_depth, changes, len(structure))
+    
+    def _nesting_score(self, max_depth: int, changes: int, length: int) -> float:
+        """Combine maximum depth and depth transitions into a nesting score."""
+        if not length:
+            return 0.0
         nesting = min(max_depth / 10.0, 1.0)
-        transitions = min(changes / len(structure), 1.0)
+        transitions = min(changes / length, 1.0)
         return nesting * 0.6 + transitions * 0.4
     
-    def detect_knots(self, structure: str) -> Dict:
-        """Identify knot-prone regions with multiple criteria."""
-        writhe = self.compute_writhe(structure)
-        crossings = self.identify_crossing_patterns(structure)
-        pairs = self._get_base_pairs(structure)
-        nesting = max([0] + [max(0, max(0, *[1 if i < k < j else 0 for i, j in pairs])) for k in range(len(structure))]) if pairs else 0
+    def _compute_all(self, structure: str) -> Dict:
+        """Walk the structure once, collecting pairs, writhe and nesting statistics."""
+        if _core is not None:
+            return _core.compute_all(structure)
+        opens, closes, stack = [], [], []
+        writhe, depth, max_depth, changes = 0, 0, 0, 0
+        for pos, char in enumerate(structure):
+            if char == '(':
+                stack.append((pos, len(stack)))
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if stack:
+                    open_pos, level = stack.pop()
+                    opens.append(open_pos)
+                    closes.append(pos)
+                    depth_diff = len(stack) - level
+                    writhe += (depth_diff > 0) - (depth_diff < 0)
+            else:
+                continue
+            # Every bracket moves the depth, so each one is a transition
+            max_depth = max(max_depth, depth)
+            changes += 1
+        opens = np.asarray(opens, dtype=np.int32)
+        closes = np.asarray(closes, dtype=np.int32)
+        order = np.argsort(opens, kind='stable')
+        return {
+            'opens': opens[order], 'closes': closes[order], 'writhe': float(writhe),
+            'max_depth': max_depth, 'transitions': changes
+        }
+    
+    def detect_knots(self, structure: str, features: Dict = None) -> Dict:
+        """
+        Identify knot-prone regions with multiple criteria.
+        features may carry a precomputed _compute_all(structure) result.
+        """
+        if features is None:
+            features = self._compute_all(structure)
+        writhe = features['writhe']
+        opens, closes = features['opens'], features['closes']
+        crossings = self._sweep_crossings(opens, closes)
+        # 1 if any position lies strictly inside a pair, i.e. some pair spans more than two bases
+        nesting = 1 if (closes - opens > 1).any() else 0
         linking = nesting + writhe
         
         complexity = (
             min(abs(writhe) / 2.0, 1.0) * 0.3 +
             min(len(crossings) / 3.0, 1.0) * 0.3 +
             min(abs(linking) / 5.0, 1.0) * 0.2 +
-            self._calc_nesting_complexity(structure) * 0.2
+            self._nesting_score(features['max_depth'], features['transitions'], len(structure)) * 0.2
         )
         
         return {
@@ -80,28 +214,28 @@ class KnotAnalyzer:
             'risk_level': ('LOW' if complexity < 0.1 else 'MEDIUM' if complexity < 0.2 else 'HIGH' if complexity < 0.3 else 'CRITICAL')
         }
     
-    def analyze_window_knots(self, predictions: List[Dict]) -> List[Dict]:
+    def analyze_window_knots(self, predictions: List[Dict]) -> WindowTable:
         """Analyze knots across sliding window predictions."""
         results = []
         for pred in predictions:
-            data = self.detect_knots(pred['structure'])
+            features = self._compute_all(pred['structure'])
+            data = self.detect_knots(pred['structure'], features)
             data.update({'window_start': pred['window_start'], 'window_end': pred['window_end'], 'sequence_id': pred.get('sequence_id', 'unknown')})
             results.append(data)
-        return results
+        return WindowTable.from_records(results)
     
-    def summarize_knot_regions(self, window_results: List[Dict]) -> Dict:
-        """Summarize high-risk knot regions across genome."""
-        high_risk = [r for r in window_results if r['risk_level'] in ['HIGH', 'CRITICAL']]
+    def summarize_knot_regions(self, window_results) -> Dict:
+        """Summarize high-risk knot regions across genome (WindowTable or list of dicts)."""
+        table = window_results if isinstance(window_results, WindowTable) else WindowTable.from_records(window_results)
+        high_risk = [table[i] for i in np.flatnonzero(np.isin(table.risk_level, ('HIGH', 'CRITICAL')))]
         return {
-            'total_windows_analyzed': len(window_results),
+            'total_windows_analyzed': len(table),
             'high_risk_windows': len(high_risk),
-            'average_complexity': float(np.mean([r['complexity_score'] for r in window_results])),
-            'max_complexity': float(max([r['complexity_score'] for r in window_results])),
+            'average_complexity': float(np.mean(table.complexity_score)),
+            'max_complexity': float(table.complexity_score.max()),
             'high_risk_regions': high_risk,
             'risk_distribution': {
-                'LOW': len([r for r in window_results if r['risk_level'] == 'LOW']),
-                'MEDIUM': len([r for r in window_results if r['risk_level'] == 'MEDIUM']),
-                'HIGH': len([r for r in window_results if r['risk_level'] == 'HIGH']),
-                'CRITICAL': len([r for r in window_results if r['risk_level'] == 'CRITICAL'])
+                level: int(np.count_nonzero(table.risk_level == level))
+                for level in ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
             }
         }
@@ -1,6 +1,8 @@
 """Main orchestration module for DNA secondary structure prediction pipeline."""
 
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from sequence_parser import SequenceParser
 from structure_predictor import StructurePredictor
@@ -10,6 +12,26 @@ from bioinformatics_analyzer import BioinformaticsAnalyzer
 import config
 
 
+def _predict_sequence(predictor: StructurePredictor, sequence: str):
+    """Fold a whole sequence and its sliding windows."""
+    return predictor.predict_structure(sequence), predictor.sliding_window_prediction(sequence, stride=15)
+
+
+# Per-process predictor for pooled folding, built once by _init_worker
+_worker_predictor = None
+
+
+def _init_worker(window_size: int, cache_size: int):
+    """Build the predictor this worker process reuses for every sequence it folds."""
+    global _worker_predictor
+    _worker_predictor = StructurePredictor(window_size, cache_size)
+
+
+def _predict_in_worker(sequence: str):
+    """Process-pool entry point for the fold step."""
+    return _predict_sequence(_worker_predictor, sequence)
+
+
 class DNAStructurePipeline:
     """Complete pipeline orchestrating all analysis steps."""
     
@@ -21,12 +43,14 @@ class DNAStructurePipeline:
         self.fasta_path = fasta_path
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.workers = config.MAX_WORKERS or os.cpu_count() or 1
         
         self.parser = SequenceParser()
         self.predictor = StructurePredictor()
         self.analyzer = KnotAnalyzer()
-        self.visualizer = StructureVisualizer(output_dir)
-        self.bio_analyzer = BioinformaticsAnalyzer(output_dir)
+        # Each figure is saved straight away, so one pooled figure per layout can be reused
+        self.visualizer = StructureVisualizer(output_dir, reuse_figures=True)
+        self.bio_analyzer = BioinformaticsAnalyzer(output_dir, workers=self.workers)
         
         self.results = {}
     
@@ -77,14 +101,20 @@ class DNAStructurePipeline:
             structure_data = {}
             window_predictions = []
             
-            for seq_id, sequence in sequences.items():
-                pred = self.predictor.predict_structure(sequence)
+            if self.workers <= 1 or len(sequences) < 2:
+                folded = [_predict_sequence(self.predictor, seq) for seq in sequences.values()]
+            else:
+                # Sequences are independent, so fold them across worker processes, each
+                # keeping one predictor so its fold cache carries over between sequences
+                chunksize = max(1, len(sequences) // (self.workers * 4))
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(self.predictor.window_size, self.predictor.cache_size)) as pool:
+                    folded = list(pool.map(_predict_in_worker, sequences.values(), chunksize=chunksize))
+            
+            for seq_id, (pred, windows) in zip(sequences, folded):
                 pred['sequence_id'] = seq_id
                 structure_data[seq_id] = pred
                 
-                windows = self.predictor.sliding_window_prediction(
-                    sequence, stride=15
-                )
                 for w in windows:
                     w['sequence_id'] = seq_id
                 window_predictions.extend(windows)
@@ -100,26 +130,22 @@ class DNAStructurePipeline:
             
             # Step 3.5: Bioinformatics analysis (pass window_predictions which has sequence/structure)
             bio_report = self.bio_analyzer.analyze_all(window_predictions)
+            self.bio_analyzer.close()
             
             # Step 4: Visualize results
             print("\n[4/4] Generating visualizations...")
-            for seq_id, pred in structure_data.items():
-                fig = self.visualizer.draw_dot_bracket(
-                    pred['sequence'], 
-                    pred['structure'],
-                    title=f"Structure: {seq_id}"
-                )
-                self.visualizer.save_figure(fig, f"{seq_id}_structure.png")
+            specs = [{'plot': 'draw_dot_bracket', 'args': (pred['sequence'], pred['structure']),
+                      'kwargs': {'title': f"Structure: {seq_id}"}, 'filename': f"{seq_id}_structure.png"}
+                     for seq_id, pred in structure_data.items()]
             
             # Plot landscape
-            fig = self.visualizer.plot_knot_risk_landscape(
-                knot_results,
-                seq_id=list(sequences.keys())[0] if sequences else "all"
-            )
-            self.visualizer.save_figure(fig, "knot_risk_landscape.png")
-            
-            fig = self.visualizer.plot_risk_distribution(summary)
-            self.visualizer.save_figure(fig, "risk_distribution.png")
+            specs.append({'plot': 'plot_knot_risk_landscape', 'args': (knot_results,),
+                          'kwargs': {'seq_id': list(sequences.keys())[0] if sequences else "all"},
+                          'filename': "knot_risk_landscape.png"})
+            specs.append({'plot': 'plot_risk_distribution', 'args': (summary,),
+                          'filename': "risk_distribution.png"})
+            self.visualizer.save_figures_batch(specs, workers=self.workers)
+            self.visualizer.close_pool()
             
             # Step 5: Save results
             self._save_results(stats, structure_data, knot_results, summary)
@@ -144,7 +170,7 @@ class DNAStructurePipeline:
             json.dump(output_json, f, indent=2)
         
         with open(self.output_dir / 'knot_details.json', 'w') as f:
-            json.dump(knots, f, indent=2, default=str)
+            json.dump(knots.to_records(), f, indent=2, default=str)
 
 
 def main():
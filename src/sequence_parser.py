@@ -1,11 +1,18 @@
 """Sequence parsing and validation module for FASTA files."""
 
-import re
+import mmap
+import os
 from typing import Dict, List, Tuple
 from pathlib import Path
 import config
 
 
+# Byte tables for preprocess_sequence: uppercase atgcun and drop every other byte in one pass
+_UPPER_TABLE = bytes.maketrans(b'atgcun', b'ATGCUN')
+_DELETE_BYTES = bytes(c for c in range(256) if chr(c).upper() not in 'ATGCUN')
+_WHITESPACE = b' \t\r\n'
+
+
 class SequenceParser:
     """Parse and validate DNA/RNA sequences from FASTA format."""
     
@@ -17,25 +24,27 @@ class SequenceParser:
     def parse_fasta(self, filepath: str) -> Dict[str, str]:
         """Parse FASTA file and return sequence dictionary."""
         sequences = {}
-        current_id = None
-        current_seq = []
         
-        with open(filepath, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if line.startswith('>'):
-                    if current_id:
-                        sequences[current_id] = ''.join(current_seq)
-                    current_id = line[1:].split()[0]
-                    current_seq = []
-                else:
-                    current_seq.append(line.upper())
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return sequences
             
-            if current_id:
-                sequences[current_id] = ''.join(current_seq)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # Records start at a '>' that begins a line; anything before the first is ignored
+                if data[:1] == b'>':
+                    start = 1
+                else:
+                    start = data.find(b'\n>') + 2
+                    if start == 1:
+                        return sequences
+                while True:
+                    end = data.find(b'\n>', start)
+                    header, _, body = data[start:end if end >= 0 else len(data)].partition(b'\n')
+                    seq_id = header.split()[0].decode()
+                    sequences[seq_id] = body.translate(None, _WHITESPACE).upper().decode('ascii', 'replace')
+                    if end < 0:
+                        break
+                    start = end + 2
         
         return sequences
     
@@ -55,9 +64,8 @@ class SequenceParser:
     
     def preprocess_sequence(self, sequence: str) -> str:
         """Clean and normalize sequence."""
-        seq = sequence.upper()
-        seq = re.sub(r'[^ATGCUN]', '', seq)
-        return seq
+        raw = sequence.encode('ascii', 'ignore')
+        return raw.translate(_UPPER_TABLE, _DELETE_BYTES).decode('ascii')
     
     def compute_stats(self, sequences: Dict[str, str]) -> Dict:
         """Compute nucleotide composition and GC content."""
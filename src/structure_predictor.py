@@ -1,97 +1,305 @@
 """Secondary structure prediction using thermodynamic models."""
 
+from collections import OrderedDict
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import config
 
+try:
+    import _core  # compiled kernels, built from _core.pyx
+except ImportError:  # the extension is optional; Numba or NumPy are used instead
+    _core = None
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional; the NumPy fill below is used instead
+    HAVE_NUMBA = False
+
+
+# Base codes used by the DP kernels; anything outside ACGTU shares the last code.
+_BASES = 'ACGTU'
+_BASE_CODES = np.full(256, len(_BASES), dtype=np.uint8)
+for _code, _base in enumerate(_BASES):
+    _BASE_CODES[ord(_base)] = _code
+
+# Cells scored per NumPy call by the fallback fill
+_FILL_BLOCK = 1 << 16
+
+
+def _encode(sequence: str) -> np.ndarray:
+    """Encode a sequence as uint8 base codes via the 256-entry lookup table."""
+    return _BASE_CODES[np.frombuffer(sequence.encode('ascii', 'replace'), dtype=np.uint8)]
+
+
+def _nussinov_fill_loops(seq_codes, pair_table, dp, bt, min_loop, max_span):
+    """
+    Fill the banded score array dp[i, j - i] = max base pairs in seq[i:j+1]
+    for spans up to max_span (dp has max_span columns).
+    bt[i, j - i] records the traceback move: k - i if i pairs with k, or -1 to skip j.
+    Every bt cell of the band is written, so bt needs no initial fill.
+    """
+    n = seq_codes.shape[0]
+    # Spans too short to pair get no move; a traceback reaching them just skips j
+    for length in range(1, min(min_loop, max_span) + 1):
+        for i in range(n - length + 1):
+            bt[i, length - 1] = -1
+    for length in range(min_loop + 1, max_span + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            best = dp[i, length - 2] if length >= 2 else 0
+            split = -1
+            code_i = seq_codes[i]
+            for k in range(i, j):
+                if pair_table[code_i, seq_codes[k]]:
+                    score = 1
+                    if i + 1 <= k - 1:
+                        score += dp[i + 1, k - i - 2]
+                    if k + 1 <= j:
+                        score += dp[k + 1, j - k - 1]
+                    if score > best:
+                        best = score
+                        split = k - i
+            dp[i, length - 1] = best
+            bt[i, length - 1] = split
+
+
+def _nussinov_fill_numpy(seq_codes, pair_table, dp, bt, min_loop, max_span):
+    """
+    Same fill as _nussinov_fill_loops, one NumPy pass per span length.
+    Every cell on a band column depends only on shorter lengths, so all i
+    for a length are scored together, in row blocks of about _FILL_BLOCK cells.
+    """
+    n = seq_codes.shape[0]
+    # pairs[i, d] says whether seq[i] pairs with seq[i + d]; the padding code pairs with nothing
+    padded = np.concatenate([seq_codes, np.full(max_span, len(_BASES), dtype=seq_codes.dtype)])
+    pairs = pair_table[seq_codes[:, None], np.lib.stride_tricks.sliding_window_view(padded, max_span)[:n]] != 0
+    # A span of one never pairs, even with min_loop 0
+    short = max(min_loop, 1)
+    bt[:, :min(short, max_span)] = -1
+    for length in range(short + 1, max_span + 1):
+        count = n - length + 1
+        # Candidate k = i + d for d in 0..length-2; right[i, d] = dp[k + 1, j] walks
+        # an anti-diagonal of the band, so it is a strided view rather than a gather
+        right = np.lib.stride_tricks.as_strided(
+            dp[1:, length - 2:], shape=(count, length - 1),
+            strides=(dp.strides[0], dp.strides[0] - dp.strides[1]), writeable=False)
+        step = max(1, _FILL_BLOCK // (length - 1))
+        for lo in range(0, count, step):
+            hi = min(count, lo + step)
+            scores = right[lo:hi] + 1
+            if length > 3:
+                # left is dp[i+1, k-1], empty (0) for d < 2
+                scores[:, 2:] += dp[lo + 1:hi + 1, :length - 3]
+            scores[~pairs[lo:hi, :length - 1]] = -1
+            # argmax keeps the first best k, as the loop's strict > does
+            top = scores.argmax(axis=1)
+            score = scores[np.arange(hi - lo), top]
+            best = dp[lo:hi, length - 2]
+            better = score > best
+            dp[lo:hi, length - 1] = np.where(better, score, best)
+            bt[lo:hi, length - 1] = np.where(better, top, -1)
+
+
+def _unband(band: np.ndarray, start: int = 0, size: int = None) -> np.ndarray:
+    """Square dp[i][j] matrix for rows start..start+size-1 of a banded [i, j - i] array."""
+    size = band.shape[0] - start if size is None else size
+    full = np.zeros((size, size), dtype=band.dtype)
+    for d in range(min(band.shape[1], size)):
+        rows = np.arange(size - d)
+        full[rows, rows + d] = band[start + rows, d]
+    return full
+
+
+if _core is not None:
+    _nussinov_fill = _core.nussinov_fill
+elif HAVE_NUMBA:
+    _nussinov_fill = njit(cache=True)(_nussinov_fill_loops)
+    # Compile (or load from the on-disk cache) at import rather than on the first window.
+    _nussinov_fill(np.zeros(2, dtype=np.uint8), np.zeros((len(_BASES) + 1,) * 2, dtype=np.uint8),
+                   np.zeros((2, 2), dtype=np.int16), np.full((2, 2), -1, dtype=np.int16), 1, 2)
+else:
+    _nussinov_fill = _nussinov_fill_numpy
+
 
 class StructurePredictor:
     """Predict DNA/RNA secondary structures using Nussinov algorithm."""
     
-    def __init__(self, window_size: int = config.WINDOW_SIZE):
+    def __init__(self, window_size: int = config.WINDOW_SIZE,
+                 cache_size: int = config.FOLD_CACHE_SIZE):
         self.window_size = window_size
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, Tuple[str, int]]' = OrderedDict()
         self.bp_complement = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G', 'U': 'A'}
         self.min_stem_length = config.MIN_STEM_LENGTH
+        self.pair_table = np.zeros((len(_BASES) + 1,) * 2, dtype=np.uint8)
+        # Flat ASCII table for scalar can_pair calls, indexed by ord(base1) * 128 + ord(base2)
+        pair_ascii = np.zeros(128 * 128, dtype=np.uint8)
+        for base1, base2 in self.bp_complement.items():
+            self.pair_table[_BASE_CODES[ord(base1)], _BASE_CODES[ord(base2)]] = 1
+            pair_ascii[ord(base1) * 128 + ord(base2)] = 1
+        self._pair_ascii = pair_ascii.tobytes()
     
     def can_pair(self, base1: str, base2: str) -> bool:
         """Check if two bases can form Watson-Crick base pair."""
-        return base2 == self.bp_complement.get(base1, None)
+        code1, code2 = ord(base1), ord(base2)
+        return code1 < 128 and code2 < 128 and self._pair_ascii[code1 * 128 + code2] == 1
     
-    def nussinov_algorithm(self, sequence: str, min_loop: int = 1) -> np.ndarray:
+    def nussinov_algorithm(self, sequence: str, min_loop: int = 1,
+                           max_span: int = None) -> np.ndarray:
         """
         Nussinov algorithm for secondary structure prediction.
         Returns score matrix where dp[i][j] = max base pairs in seq[i:j+1].
+        If max_span is given, only spans j - i + 1 <= max_span are filled.
+        """
+        return _unband(self._fold(sequence, min_loop, max_span)[0])
+    
+    def _fold(self, sequence: str, min_loop: int = 1,
+              max_span: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fill the Nussinov scores and traceback pointers for spans up to max_span.
+        Both are banded (n, span) arrays indexed [i, j - i], so a window scan
+        needs memory linear in the sequence length.
         """
         n = len(sequence)
-        dp = np.zeros((n, n), dtype=float)
-        
-        for length in range(min_loop + 1, n + 1):
-            for i in range(n - length + 1):
-                j = i + length - 1
-                
-                # No pairing at position j
-                dp[i][j] = dp[i][j - 1]
-                
-                # Try pairing i with k
-                for k in range(i, j):
-                    if self.can_pair(sequence[i], sequence[k]):
-                        score = 1 + (dp[i + 1][k - 1] if i + 1 <= k - 1 else 0)
-                        score += (dp[k + 1][j] if k + 1 <= j else 0)
-                        dp[i][j] = max(dp[i][j], score)
-        
-        return dp
+        span = n if max_span is None else min(max_span, n)
+        # Scores are at most span / 2 and pointer offsets at most span - 1, so windows stay int16
+        dtype = np.int16 if span <= np.iinfo(np.int16).max else np.int32
+        dp = np.zeros((n, span), dtype=dtype)
+        # The fill writes every pointer cell in the band
+        bt = np.empty((n, span), dtype=dtype)
+        _nussinov_fill(_encode(sequence), self.pair_table, dp, bt, min_loop, span)
+        return dp, bt
     
-    def traceback(self, sequence: str, dp: np.ndarray, i: int, j: int) -> str:
+    def traceback(self, sequence: str, dp: np.ndarray, i: int, j: int,
+                  bt: np.ndarray = None) -> str:
         """Traceback to construct dot-bracket notation."""
         if i > j:
             return '.' * (j - i + 1)
         
-        structure = ['.' for _ in range(len(sequence))]
+        inner = self.traceback_range(sequence, dp, i, j, bt)
+        return '.' * i + inner + '.' * (len(sequence) - j - 1)
+    
+    def traceback_range(self, sequence: str, dp: np.ndarray, i0: int, j0: int,
+                        bt: np.ndarray = None) -> str:
+        """
+        Traceback over seq[i0:j0+1] only, returning its dot-bracket string.
+        With the banded bt pointers from _fold each step is a lookup; without
+        them the pairing partner is recovered from the full dp matrix.
+        """
+        if bt is not None:
+            if i0 < 0 or j0 >= bt.shape[0] or j0 - i0 >= bt.shape[1]:
+                raise IndexError(f"Span [{i0}, {j0}] outside the folded band")
+            if _core is not None:
+                return _core.traceback_range(bt, i0, j0)
+        
+        structure = bytearray(b'.' * (j0 - i0 + 1))
+        work = [(i0, j0)]
         
-        def traceback_recursive(i: int, j: int):
+        while work:
+            i, j = work.pop()
             if i > j:
-                return
+                continue
             
-            if dp[i][j] == dp[i][j - 1]:
-                traceback_recursive(i, j - 1)
+            if bt is not None:
+                k = int(bt[i, j - i])
+                k = k + i if k >= 0 else -1
             else:
-                for k in range(i, j):
-                    if self.can_pair(sequence[i], sequence[k]):
-                        score = 1 + (dp[i + 1][k - 1] if i + 1 <= k - 1 else 0)
-                        score += (dp[k + 1][j] if k + 1 <= j else 0)
-                        
-                        if dp[i][j] == score:
-                            structure[i] = '('
-                            structure[k] = ')'
-                            traceback_recursive(i + 1, k - 1)
-                            traceback_recursive(k + 1, j)
-                            return
+                k = self._split_point(sequence, dp, i, j)
+            if k < 0:
+                work.append((i, j - 1))
+                continue
+            
+            structure[i - i0] = ord('(')
+            structure[k - i0] = ord(')')
+            work.append((k + 1, j))
+            work.append((i + 1, k - 1))
+        
+        return structure.decode('ascii')
+    
+    def _split_point(self, sequence: str, dp: np.ndarray, i: int, j: int) -> int:
+        """Return the k that i pairs with in the optimum for dp[i][j], or -1 to skip j."""
+        if dp[i][j] == dp[i][j - 1]:
+            return -1
         
-        traceback_recursive(i, j)
-        return ''.join(structure)
+        for k in range(i, j):
+            if self.can_pair(sequence[i], sequence[k]):
+                score = 1 + (dp[i + 1][k - 1] if i + 1 <= k - 1 else 0)
+                score += (dp[k + 1][j] if k + 1 <= j else 0)
+                
+                if dp[i][j] == score:
+                    return k
+        return -1
+    
+    def _cache_get(self, sequence: str) -> Optional[Tuple[str, int]]:
+        """Look up a cached (structure, base_pairs) fold, marking it recently used."""
+        hit = self._cache.get(sequence)
+        if hit is not None:
+            self._cache.move_to_end(sequence)
+        return hit
     
-    def predict_structure(self, sequence: str) -> Dict:
-        """Predict secondary structure for a sequence."""
-        dp = self.nussinov_algorithm(sequence)
-        dot_bracket = self.traceback(sequence, dp, 0, len(sequence) - 1)
+    def _cache_put(self, sequence: str, structure: str, base_pairs: int):
+        """Remember a fold, evicting the least recently used beyond cache_size."""
+        if self.cache_size <= 0:
+            return
+        self._cache[sequence] = (structure, base_pairs)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def predict_structure(self, sequence: str, keep_matrix: bool = False) -> Dict:
+        """
+        Predict secondary structure for a sequence.
+        The DP matrix is only returned (as 'score_matrix') when keep_matrix is set;
+        otherwise repeated sequences are served from the fold cache.
+        """
+        hit = None if keep_matrix else self._cache_get(sequence)
+        if hit is None:
+            dp, bt = self._fold(sequence)
+            hit = (self.traceback(sequence, dp, 0, len(sequence) - 1, bt), int(dp[0, len(sequence) - 1]))
+            self._cache_put(sequence, *hit)
         
-        return {
+        result = {
             'sequence': sequence,
-            'structure': dot_bracket,
-            'base_pairs': int(dp[0][len(sequence) - 1]),
-            'score_matrix': dp,
+            'structure': hit[0],
+            'base_pairs': hit[1],
             'length': len(sequence)
         }
+        if keep_matrix:
+            result['score_matrix'] = _unband(dp)
+        return result
     
-    def sliding_window_prediction(self, sequence: str, stride: int = 10) -> List[Dict]:
-        """Predict structures in sliding windows."""
+    def sliding_window_prediction(self, sequence: str, stride: int = 10,
+                                  keep_matrix: bool = False) -> List[Dict]:
+        """
+        Predict structures in sliding windows.
+        A single DP over the whole sequence, limited to window-sized spans, is
+        shared by all windows; each window is then only a traceback over it.
+        Windows already in the fold cache skip the traceback, and the DP is
+        only filled once some window misses.
+        """
         results = []
+        dp = bt = None
         
         for i in range(0, len(sequence) - self.window_size, stride):
-            window = sequence[i:i + self.window_size]
-            pred = self.predict_structure(window)
-            pred['window_start'] = i
-            pred['window_end'] = i + self.window_size
+            j = i + self.window_size - 1
+            window = sequence[i:j + 1]
+            hit = None if keep_matrix else self._cache_get(window)
+            if hit is None:
+                if dp is None:
+                    dp, bt = self._fold(sequence, max_span=self.window_size)
+                hit = (self.traceback_range(sequence, dp, i, j, bt), int(dp[i, j - i]))
+                self._cache_put(window, *hit)
+            
+            pred = {
+                'sequence': window,
+                'structure': hit[0],
+                'base_pairs': hit[1],
+                'length': self.window_size,
+                'window_start': i,
+                'window_end': i + self.window_size
+            }
+            if keep_matrix:
+                pred['score_matrix'] = _unband(dp, i, self.window_size)
             results.append(pred)
         
         return results
@@ -1,42 +1,282 @@
 """Visualization module for structures and knot analysis."""
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, wraps
+import io
+from itertools import repeat
+import matplotlib
+matplotlib.use('Agg')  # figures are only ever written to files; skip GUI backend setup
 import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
 import matplotlib.patches as mpatches
 from matplotlib.patches import Arc
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 import config
+from knot_analyzer import WindowTable
 from pathlib import Path
+from typing import Dict, List
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional; the NumPy bracket matching is used instead
+    HAVE_NUMBA = False
+
+# Risk levels in sorted order, as searchsorted needs; unknown levels map one past the end
+_RISK_LEVELS = np.array(['CRITICAL', 'HIGH', 'LOW', 'MEDIUM'])
+# Pairs per gather in _compile_structure_numpy, keeping each block's indices and rows cache-resident
+_GATHER_BLOCK = 4096
+
+
+# Least-squares polynomial fits in turns q = angle / 2pi over [-1/4, 1/4]:
+# sin(2 pi q) ~ q * S(q^2) and cos(2 pi q) ~ 1 + q^2 * C(q^2), to about 1e-5
+_SIN_COEFFS = np.array([6.2831639509, -41.3371304145, 81.3403861393, -70.9899330175], dtype=np.float32)
+_COS_COEFFS = np.array([-19.7366028192, 64.6876223311, -78.4628574803], dtype=np.float32)
+
+
+def _fast_sincos(angles: np.ndarray, sin: np.ndarray = None, cos: np.ndarray = None) -> tuple:
+    """
+    Polynomial (sin, cos) of float32 angles, accurate far beyond pixel resolution.
+    Results are written into sin and cos when given (e.g. column views of one array).
+    """
+    q = angles * np.float32(0.5 / np.pi)
+    q -= np.round(q)
+    # Fold [-1/2, 1/2] turns onto [-1/4, 1/4]: sin(pi - x) = sin(x), cos(pi - x) = -cos(x)
+    flip = np.abs(q) > 0.25
+    q = np.where(flip, np.copysign(np.float32(0.5), q) - q, q)
+    q2 = q * q
+    s1, s2, s3, s4 = _SIN_COEFFS
+    c1, c2, c3 = _COS_COEFFS
+    sin = np.multiply(q, s1 + q2 * (s2 + q2 * (s3 + q2 * s4)), out=sin)
+    cos = np.add(1, q2 * (c1 + q2 * (c2 + q2 * c3)), out=cos)
+    np.negative(cos, out=cos, where=flip)
+    return sin, cos
+
+
+@lru_cache(maxsize=128)
+def _arc_positions(length: int) -> np.ndarray:
+    """Unit semicircle positions for length bases as float32 (x, y) rows, cached per length."""
+    # float32 is ample for screen coordinates and halves the data handed to matplotlib
+    angles = np.linspace(0.0, np.pi, length, dtype=np.float32)
+    positions = np.empty((length, 2), dtype=np.float32)
+    _fast_sincos(angles, sin=positions[:, 1], cos=positions[:, 0])
+    positions.setflags(write=False)
+    return positions
+
+
+@lru_cache(maxsize=None)
+def _to_rgba(color: str) -> tuple:
+    """Parse a colour spec to an RGBA tuple, memoized since the same palette entries recur."""
+    return mcolors.to_rgba(color)
+
+
+def _match_brackets(chars: np.ndarray) -> tuple:
+    """Matched (opens, closes) index arrays of dot-bracket bytes, in order of the closing bracket."""
+    is_open, is_close = chars == ord('('), chars == ord(')')
+    depth = np.cumsum(is_open.astype(np.intp) - is_close)
+    if depth.size and depth.min() < 0:
+        # An unmatched ')' breaks the depth grouping below; match with a stack instead
+        opens, closes, stack = [], [], []
+        for pos, char in enumerate(chars.tolist()):
+            if char == ord('('):
+                stack.append(pos)
+            elif char == ord(')') and stack:
+                opens.append(stack.pop())
+                closes.append(pos)
+        return np.array(opens, dtype=np.intp), np.array(closes, dtype=np.intp)
+    
+    opens, closes = np.flatnonzero(is_open), np.flatnonzero(is_close)
+    if not closes.size:
+        return opens[:0], closes
+    # At each depth level opens and closes alternate by position, so the k-th open
+    # at a level pairs with the k-th close there; unmatched opens come last in a level
+    open_level, close_level = depth[opens], depth[closes] + 1
+    open_order = np.argsort(open_level, kind='stable')
+    close_order = np.argsort(close_level, kind='stable')
+    levels = open_level[open_order]
+    open_count = np.bincount(open_level)
+    close_count = np.bincount(close_level, minlength=open_count.size)
+    rank = np.arange(levels.size) - (np.cumsum(open_count) - open_count)[levels]
+    partner = np.empty_like(closes)
+    partner[close_order] = opens[open_order][rank < close_count[levels]]
+    return partner, closes
+
+
+def _compile_structure_loops(chars, positions):
+    """
+    Match brackets in one stack scan and gather each pair's endpoints from positions.
+    Returns (opens, closes, segments) in order of the closing bracket, with
+    segments[m] = (positions[opens[m]], positions[closes[m]]).
+    """
+    n = chars.shape[0]
+    stack = np.empty(n, dtype=np.int32)
+    opens = np.empty(n // 2, dtype=np.int32)
+    closes = np.empty(n // 2, dtype=np.int32)
+    segments = np.empty((n // 2, 2, 2), dtype=np.float32)
+    depth = 0
+    count = 0
+    for pos in range(n):
+        char = chars[pos]
+        if char == 40:  # '('
+            stack[depth] = pos
+            depth += 1
+        elif char == 41 and depth > 0:  # ')'
+            depth -= 1
+            start = stack[depth]
+            opens[count] = start
+            closes[count] = pos
+            segments[count, 0, 0] = positions[start, 0]
+            segments[count, 0, 1] = positions[start, 1]
+            segments[count, 1, 0] = positions[pos, 0]
+            segments[count, 1, 1] = positions[pos, 1]
+            count += 1
+    return opens[:count], closes[:count], segments[:count]
+
+
+def _compile_structure_numpy(chars, positions):
+    """Same result as _compile_structure_loops from the vectorized bracket matching."""
+    opens, closes = _match_brackets(chars)
+    segments = np.empty((opens.size, 2, 2), dtype=np.float32)
+    # Gather blocks of pairs taken in opening order, so reads stream through positions
+    # even when closing order jumps around; each row still lands in closing order
+    order = np.argsort(opens, kind='stable')
+    for start in range(0, order.size, _GATHER_BLOCK):
+        block = order[start:start + _GATHER_BLOCK]
+        segments[block, 0] = positions[opens[block]]
+        segments[block, 1] = positions[closes[block]]
+    return opens.astype(np.int32), closes.astype(np.int32), segments
+
+
+if HAVE_NUMBA:
+    _compile_structure = njit(cache=True)(_compile_structure_loops)
+    # Compile (or load from the on-disk cache) at import; positions arrive read-only from _arc_positions
+    _compile_structure(np.frombuffer(b'()', dtype=np.uint8), _arc_positions(2))
+else:
+    _compile_structure = _compile_structure_numpy
+
+
+@lru_cache(maxsize=256)
+def _structure_to_segments(structure: str, length: int) -> tuple:
+    """Arc positions and read-only LineCollection segments for a structure, cached for redraws."""
+    positions = _arc_positions(length)
+    segments = _compile_structure(np.frombuffer(structure.encode('ascii', 'replace'), dtype=np.uint8),
+                                  positions)[2]
+    segments.setflags(write=False)
+    return positions, segments
+
+
+@lru_cache(maxsize=256)
+def _base_pair_arcs(structure: str) -> tuple:
+    """Cached (open, close) pairs of a structure, in order of the closing bracket."""
+    opens, closes = _match_brackets(np.frombuffer(structure.encode('ascii', 'replace'), dtype=np.uint8))
+    return tuple(zip(opens.tolist(), closes.tolist()))
+
+
+def _styled(method):
+    """Run a plotting method with the visualizer's style applied over matplotlib's defaults."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with plt.style.context(self._style):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _results_to_soa(window_results):
+    """Window starts, complexity scores, crossing counts and risk levels as parallel arrays."""
+    if isinstance(window_results, WindowTable):
+        return (window_results.window_start, window_results.complexity_score,
+                window_results.crossing_count, window_results.risk_level)
+    rows = np.array(
+        [(r['window_start'], r['complexity_score'], r['crossing_count'], r['risk_level'])
+         for r in window_results],
+        dtype=[('start', np.int64), ('complexity', float), ('crossings', np.int32), ('risk', 'U8')])
+    return rows['start'], rows['complexity'], rows['crossings'], rows['risk']
 
 
 class StructureVisualizer:
     """Visualize secondary structures and knot analysis results."""
     
-    def __init__(self, output_dir: str = config.OUTPUT_DIR):
+    def __init__(self, output_dir: str = config.OUTPUT_DIR,
+                 png_compress_level: int = 3, jpeg_quality: int = 85,
+                 reuse_figures: bool = False):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        # Encoder settings for save_figure, trading file size for write speed
+        self.png_compress_level = png_compress_level
+        self.jpeg_quality = jpeg_quality
+        # With reuse_figures, each plot method hands back the same Figure for a given layout,
+        # so a returned figure is only valid until the next plot with that layout
+        self.reuse_figures = reuse_figures
+        self._figure_pool = {}
         self.colors = config.COLOR_PALETTE
-        plt.style.use('seaborn-v0_8-darkgrid')
+        # RGBA per ASCII structure character: brackets are stem, '.' loop, anything else bulge
+        self._char_color_lut = np.full((128, 4), _to_rgba(self.colors['bulge']), dtype=np.float32)
+        self._char_color_lut[ord('(')] = self._char_color_lut[ord(')')] = _to_rgba(self.colors['stem'])
+        self._char_color_lut[ord('.')] = _to_rgba(self.colors['loop'])
+        # RGBA bar colour per entry of _RISK_LEVELS, plus a final row for unknown levels
+        self._risk_to_rgba = np.array([_to_rgba(self.colors[self._risk_to_color(level)]) for level in _RISK_LEVELS]
+                                      + [_to_rgba(self.colors['background'])], dtype=np.float32)
+        # Bar colours for plot_risk_distribution, in LOW..CRITICAL order
+        self._risk_color_list = [_to_rgba(self.colors.get(c.lower(), '#999999'))
+                                 for c in ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')]
+        # Applied per plot (see _styled) rather than installed globally with plt.style.use;
+        # layering it over 'default' keeps rcParams set elsewhere (e.g. sns.set_style) out
+        self._style = ['default', 'seaborn-v0_8-darkgrid']
+    
+    def _subplots(self, nrows: int = 1, ncols: int = 1, figsize: tuple = None):
+        """Figure and axes for one plot, taken from the figure pool when reuse_figures is set."""
+        if self.reuse_figures:
+            return self._get_pooled_figure(nrows, ncols, figsize)
+        # A bare Agg-backed Figure skips pyplot's figure manager; it is freed once unreferenced
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig, fig.subplots(nrows, ncols)
+    
+    def _get_pooled_figure(self, nrows: int, ncols: int, figsize: tuple):
+        """Pooled Figure for this layout, cleared, with fresh axes."""
+        key = (nrows, ncols, figsize)
+        fig = self._figure_pool.get(key)
+        if fig is None:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            self._figure_pool[key] = fig
+        else:
+            # Fresh axes rather than ax.clear(), which keeps grid settings from the last plot
+            fig.clear()
+        return fig, fig.subplots(nrows, ncols)
+    
+    def close_pool(self):
+        """Release the pooled figures."""
+        self._figure_pool.clear()
     
+    @_styled
     def draw_dot_bracket(self, sequence: str, structure: str, 
-                         title: str = "Secondary Structure") -> plt.Figure:
-        """Draw secondary structure as dot-bracket diagram."""
-        fig, ax = plt.subplots(figsize=(12, 6))
+                         title: str = "Secondary Structure",
+                         show_labels: bool = True,
+                         label_threshold: int = config.LABEL_THRESHOLD) -> plt.Figure:
+        """
+        Draw secondary structure as dot-bracket diagram.
+        Base letters are skipped for sequences longer than label_threshold,
+        where they would be unreadable anyway.
+        """
+        if len(structure) != len(sequence):
+            raise ValueError(f"Structure length {len(structure)} != sequence length {len(sequence)}")
+        fig, ax = self._subplots(figsize=(12, 6))
         
-        positions = self._calculate_arc_positions(structure, len(sequence))
+        positions, segments = _structure_to_segments(structure, len(sequence))
         
         # Draw bases
-        for i, (base, pos) in enumerate(zip(sequence, positions)):
-            color = self._get_base_color(structure[i])
-            ax.plot(pos[0], pos[1], 'o', markersize=8, color=color, zorder=3)
-            ax.text(pos[0], pos[1] - 0.15, base, ha='center', fontsize=9, weight='bold')
+        colors = self._char_color_lut[np.frombuffer(structure.encode('ascii', 'replace'), dtype=np.uint8)]
+        ax.scatter(positions[:, 0], positions[:, 1], c=colors, s=64, zorder=3)
+        if show_labels and len(sequence) <= label_threshold:
+            for base, (x, y) in zip(sequence, positions.tolist()):
+                ax.text(x, y - 0.15, base, ha='center', fontsize=9, weight='bold')
         
         # Draw base pairs
-        pairs = self._get_base_pair_arcs(structure)
-        for i, j in pairs:
-            pos_i = positions[i]
-            pos_j = positions[j]
-            ax.plot([pos_i[0], pos_j[0]], [pos_i[1], pos_j[1]], 
-                   'k-', linewidth=1.5, alpha=0.6, zorder=1)
+        ax.add_collection(LineCollection(segments, colors='k', linewidths=1.5, alpha=0.6, zorder=1))
         
         ax.set_xlim(-1, len(sequence) + 1)
         ax.set_ylim(-1.5, 2)
@@ -47,50 +287,25 @@ class StructureVisualizer:
         return fig
     
     def _calculate_arc_positions(self, structure: str, length: int) -> np.ndarray:
-        """Calculate 2D positions for base arc representation."""
-        positions = np.zeros((length, 2))
-        
-        for i in range(length):
-            angle = np.pi * i / (length - 1) if length > 1 else 0
-            positions[i, 0] = np.cos(angle)
-            positions[i, 1] = np.sin(angle)
-        
-        return positions
+        """Calculate 2D float32 positions for base arc representation (shared, read-only)."""
+        return _arc_positions(length)
     
     def _get_base_pair_arcs(self, structure: str) -> list:
-        """Extract base pair positions from structure."""
-        pairs = []
-        stack = []
-        for pos, char in enumerate(structure):
-            if char == '(':
-                stack.append(pos)
-            elif char == ')' and stack:
-                pairs.append((stack.pop(), pos))
-        return pairs
-    
-    def _get_base_color(self, char: str) -> str:
-        """Get color based on structure character."""
-        if char == '(':
-            return self.colors['stem']
-        elif char == ')':
-            return self.colors['stem']
-        elif char == '.':
-            return self.colors['loop']
-        else:
-            return self.colors['bulge']
+        """Extract base pair positions from structure, in order of the closing bracket."""
+        return list(_base_pair_arcs(structure))
     
+    @_styled
     def plot_knot_risk_landscape(self, window_results: list, 
                                  seq_id: str = "sequence") -> plt.Figure:
         """Plot knot risk across genomic positions."""
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 8))
+        fig, (ax1, ax2) = self._subplots(2, 1, figsize=(14, 8))
         
-        positions = [r['window_start'] for r in window_results]
-        complexity = [r['complexity_score'] for r in window_results]
-        crossings = [r['crossing_count'] for r in window_results]
+        positions, complexity, crossings, risk = _results_to_soa(window_results)
         
         # Complexity score
-        colors = [self.colors[self._risk_to_color(r['risk_level'])] 
-                 for r in window_results]
+        level = np.searchsorted(_RISK_LEVELS, risk).clip(max=_RISK_LEVELS.size - 1).astype(np.uint8)
+        level[_RISK_LEVELS[level] != risk] = _RISK_LEVELS.size
+        colors = self._risk_to_rgba[level]
         ax1.bar(positions, complexity, color=colors, alpha=0.7, width=20)
         ax1.axhline(y=config.KNOT_COMPLEXITY_THRESHOLD, color='red', 
                    linestyle='--', label='Risk Threshold')
@@ -109,19 +324,21 @@ class StructureVisualizer:
         ax2.legend()
         ax2.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        # Fixed margins matching what tight_layout settles on for this 14x8 layout,
+        # without its text-extent measuring pass
+        fig.subplots_adjust(left=0.045, right=0.99, top=0.955, bottom=0.07, hspace=0.1)
         return fig
     
+    @_styled
     def plot_risk_distribution(self, summary: dict) -> plt.Figure:
         """Plot risk level distribution."""
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._subplots(figsize=(10, 6))
         
         risks = summary['risk_distribution']
         categories = ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
         values = [risks[cat] for cat in categories]
-        colors_list = [self.colors.get(c.lower(), '#999999') for c in categories]
         
-        bars = ax.bar(categories, values, color=colors_list, alpha=0.7, edgecolor='black')
+        bars = ax.bar(categories, values, color=self._risk_color_list, alpha=0.7, edgecolor='black')
         
         for bar, val in zip(bars, values):
             height = bar.get_height()
@@ -139,12 +356,79 @@ class StructureVisualizer:
         mapping = {'LOW': 'stem', 'MEDIUM': 'loop', 'HIGH': 'bulge', 'CRITICAL': 'knot'}
         return mapping.get(risk_level, 'background')
     
+    def _pil_kwargs(self, suffix: str) -> dict:
+        """savefig options for the PIL encoder of an output file suffix (empty for other formats)."""
+        if suffix == '.png':
+            return {'pil_kwargs': {'compress_level': self.png_compress_level, 'optimize': False}}
+        if suffix in ('.jpg', '.jpeg'):
+            return {'pil_kwargs': {'quality': self.jpeg_quality, 'progressive': False, 'optimize': False}}
+        return {}
+    
+    def figure_to_bytes(self, fig: plt.Figure, fmt: str = 'png') -> bytes:
+        """Render a figure to encoded image bytes without touching disk."""
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=config.FIGURE_DPI, bbox_inches='tight',
+                    **self._pil_kwargs('.' + fmt))
+        return buffer.getvalue()
+    
+    def _output_target(self, filename: str) -> tuple:
+        """Output path and image format for filename, defaulting the format like savefig."""
+        filepath = self.output_dir / filename
+        fmt = filepath.suffix[1:].lower()
+        if not fmt:
+            fmt = plt.rcParams['savefig.format']
+            filepath = filepath.with_name(f"{filepath.name}.{fmt}")
+        return filepath, fmt
+    
     def save_figure(self, fig: plt.Figure, filename: str):
         """Save figure to output directory."""
-        filepath = self.output_dir / filename
-        fig.savefig(str(filepath), dpi=config.FIGURE_DPI, bbox_inches='tight')
+        # Name the format up front rather than letting savefig infer it from the path
+        filepath, fmt = self._output_target(filename)
+        with open(filepath, 'wb') as f:
+            fig.savefig(f, format=fmt, dpi=config.FIGURE_DPI, bbox_inches='tight',
+                        **self._pil_kwargs('.' + fmt))
         print(f"Saved: {filepath}")
-        plt.close(fig)
+    
+    def save_figures_batch(self, specs: List[Dict], workers: int = 1):
+        """
+        Render and save several figures, splitting drawing and encoding across processes.
+        Each spec names a plot method ('plot'), its 'args' and 'kwargs', and the
+        output 'filename'; only these plain values are sent to the workers.
+        The plot methods style themselves from matplotlib's defaults (see _styled),
+        so pooled output matches the serial loop under fork and spawn alike.
+        """
+        targets = [self._output_target(spec['filename']) for spec in specs]
+        jobs = [(spec['plot'], spec.get('args', ()), spec.get('kwargs', {}), fmt)
+                for spec, (_, fmt) in zip(specs, targets)]
+        if workers <= 1 or len(jobs) < 2:
+            images = [_render_job(self, job) for job in jobs]
+        else:
+            options = (str(self.output_dir), self.png_compress_level, self.jpeg_quality)
+            size = max(1, len(jobs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                images = list(pool.map(_render_in_worker, repeat(options), jobs, chunksize=size))
+        
+        for (filepath, _), image in zip(targets, images):
+            filepath.write_bytes(image)
+            print(f"Saved: {filepath}")
+
+
+def _render_job(viz: StructureVisualizer, job: tuple) -> bytes:
+    """Draw one (plot, args, kwargs, fmt) job with viz and return the encoded image."""
+    plot, args, kwargs, fmt = job
+    return viz.figure_to_bytes(getattr(viz, plot)(*args, **kwargs), fmt)
+
+
+@lru_cache(maxsize=None)
+def _worker_visualizer(options: tuple) -> StructureVisualizer:
+    """One pooled visualizer per worker process and settings, reused across its jobs."""
+    output_dir, png_compress_level, jpeg_quality = options
+    return StructureVisualizer(output_dir, png_compress_level, jpeg_quality, reuse_figures=True)
+
+
+def _render_in_worker(options: tuple, job: tuple) -> bytes:
+    """Process-pool entry point for save_figures_batch."""
+    return _render_job(_worker_visualizer(options), job)
 
 
 def main():